@@ -11,6 +11,8 @@ Options:
 
 from PIL import Image
 import math
+import mmap
+import re
 import copy
 import locale
 import os
@@ -18,6 +20,7 @@ import shutil
 import datetime
 import errno
 import random
+from collections import Counter
 from docopt import docopt
 import numpy as np
 import sys
@@ -30,6 +33,11 @@ except locale.Error:
     locale.setlocale(locale.LC_ALL, 'en_GB.UTF-8')
 
 RANDOM_SEED = 0 # Set to 0 if no seed is used, otherwise set to seed value.
+PROGRESS = sys.stdout.isatty() # Progress bars are useless when piped, and their per-iteration callback is not free.
+
+# A component line looks like "- <instance> <stdcell> ...": one C-level match
+# both filters out '+' continuations and captures the cell name.
+COMPONENT_LINE = re.compile(rb'\s*-\s+\S+\s+(\S+)')
 
 def extractDEF(filename, design):
     """
@@ -40,49 +48,46 @@ def extractDEF(filename, design):
         Path to DEF file
     """
 
-    stats = dict() # {Standard cell : amount}
+    stats = Counter() # {Standard cell : amount}
     totCells = 0 # Total amount of components, given at "COMPONENTS 52184 ;"
-    cellsCount = 0 # Cells counter
-
-    with open(filename, 'r') as f:
-        lines = f.readlines()
 
     inComponents = False
 
-    with alive_bar(len(lines)) as bar:
-        for line in lines:
-            if "COMPONENTS" in line and not inComponents:
-                inComponents = True
-                totCells = int(line.split()[1])
+    # mmap the DEF file and parse the raw bytes: the kernel pages data in on
+    # demand and no per-line str object is allocated. Only the cell names we
+    # actually keep are decoded.
+    # The progress bar tracks bytes read since the line count is not known upfront.
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf, alive_bar(buf.size(), disable=not PROGRESS) as bar:
+        for line in iter(buf.readline, b''):
+            bar(len(line))
+            # Anchored prefix checks instead of full-line substring scans:
+            # the section markers start their line, so startswith is enough
+            # and cannot match a stray "COMPONENTS" elsewhere on the line.
+            if not inComponents:
+                if line.startswith(b"COMPONENTS"):
+                    inComponents = True
+                    totCells = int(line.split(None, 2)[1])
                 continue
-            elif "COMPONENTS" in line and inComponents:
+            if line.startswith(b"END COMPONENTS"):
                 inComponents = False
                 continue
-            if inComponents and not ';' in line:
-                # If the line starts with '+', skip.
-                if line.split()[0] == '+':
-                    continue
-                stdcell = line.split()[2]
-                if stdcell in stats:
-                    stats[stdcell] += 1
-                else:
-                    stats[stdcell] = 1
-                cellsCount += 1
-            bar()
+            match = COMPONENT_LINE.match(line)
+            if match is not None:
+                stats[match.group(1).decode()] += 1
 
     # Sanity check
+    cellsCount = sum(stats.values())
     if cellsCount != totCells:
         print("Discrepency between total: {} and parsed: {}".format(totCells, cellsCount))
         print("Aborting")
         sys.exit()
 
     # Dump stats
-    outStr = ""
-    for cell in stats:
-        outStr += "{} {}\n".format(cell, stats[cell])
+    # writelines streams each row to the buffered file, instead of the
+    # quadratic "+=" string accumulation.
     outFileName = "stats/"+design+"_stats.csv"
     with open(outFileName, 'w') as f:
-        f.write(outStr)
+        f.writelines("{} {}\n".format(cell, count) for cell, count in stats.items())
     print("Exported to {}".format(outFileName))
 
 
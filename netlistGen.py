@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 Usage:
-    netlistGen.py (--lef=<file>) [--gates=n] [--name=<name>] [--dist=<file>] [--fanout=<int>] [--suppress-wires]
+    netlistGen.py (--lef=<file>) [--gates=n] [--name=<name>] [--dist=<file>] [--fanout=<int>] [--jobs=<int>] [--suppress-wires]
     netlistGen.py (--help|-h)
 
 Options:
@@ -10,14 +10,19 @@ Options:
     --name=<name>           Top module name
     --dist=<file>           Std cell distribution file
     --fanout=<int>          Average fanout, integer
+    --jobs=<int>            Parallel workers for LEF parsing
     --suppress-wires        Do not write 'wire's in netlist
     -h --help               Print this help
 
 Note: Power pins are ignored in standard cells.
 """
 
+import bisect
 import math
 import locale
+import re
+import mmap
+import multiprocessing
 import os
 import datetime
 import errno
@@ -35,16 +40,38 @@ except locale.Error:
 
 RANDOM_SEED = 0 # Set to 0 if no seed is used, otherwise set to seed value.
 NO_POWER = True # Ignore POWER pins.
+MAX_FF_FANOUT = 64 # Cap on how many cloud inputs a single FF output may drive.
+PROGRESS = sys.stdout.isatty() # Progress bars are useless when piped, and their per-iteration callback is not free.
 
 logger = logging.getLogger('default')
 
 
+# These classes are instantiated once per gate/net on multi-million gate
+# designs: __slots__ drops the per-object __dict__, roughly halving their
+# memory footprint and speeding up attribute access.
 class StdCell:
+    __slots__ = ("name", "lowerName", "pins", "width", "height",
+                 "pinNames", "pinDirs", "pinTypes", "pinIndex",
+                 "inputPins", "outputPin", "isFF", "clockPin", "clockIndex")
+
     def __init__(self, name):
         self.name = name
+        self.lowerName = name.lower() # Instance names derive from this, once per cell rather than once per instance.
         self.pins = dict() # {name : Pin instance}
         self.width = 0
         self.height = 0
+        # Parallel tuples mirroring self.pins, filled by freeze() once the
+        # cell is fully parsed. Hot per-instance loops traverse these flat
+        # arrays instead of chasing Pin objects through the dict.
+        self.pinNames = ()
+        self.pinDirs = ()
+        self.pinTypes = ()
+        self.pinIndex = {} # {pin name : position in the tuples above}
+        self.inputPins = () # Names of the INPUT pins.
+        self.outputPin = None # Name of the single OUTPUT pin, if any.
+        self.isFF = False # True if the cell owns a CLOCK pin.
+        self.clockPin = None # Name of the CLOCK pin, if any.
+        self.clockIndex = None # Position of the CLOCK pin in inputPins.
 
     def numberPins(self):
         return len(self.pins)
@@ -61,25 +88,79 @@ class StdCell:
     def setHeight(self, h):
         self.height = h
 
+    def freeze(self):
+        '''
+        Build the parallel pin tuples. Call once all pins have been added.
+        '''
+        self.pinNames = tuple(pin.name for pin in self.pins.values())
+        self.pinDirs = tuple(pin.dir for pin in self.pins.values())
+        self.pinTypes = tuple(pin.type for pin in self.pins.values())
+        self.pinIndex = {name: i for i, name in enumerate(self.pinNames)}
+        self.inputPins = tuple(pin.name for pin in self.pins.values() if pin.dir == "INPUT")
+        outputs = [pin.name for pin in self.pins.values() if pin.dir == "OUTPUT"]
+        if len(outputs) > 1:
+            logger.error("Too many outputs in cell {}\n Aborting".format(self.name))
+            sys.exit()
+        self.outputPin = outputs[0] if outputs else None
+        self.clockPin = next((pin.name for pin in self.pins.values() if pin.type == "CLOCK"), None)
+        self.isFF = self.clockPin is not None
+        if self.clockPin in self.inputPins:
+            self.clockIndex = self.inputPins.index(self.clockPin)
+
 class Pin:
+    __slots__ = ("name", "dir", "type")
+
     def __init__(self,name):
         self.name = name
         self.dir = "" # INPUT, OUTPUT, INOUT
         self.type = "" # SIGNAL, CLOCK, POWER
 
 class Instance:
+    __slots__ = ("name", "cell", "inputNets", "freeInputs", "freeMask", "output")
+
     def __init__(self, name, cell=None):
         self.name = name # str : name of the instance
         self.cell = cell # StdCell
-        self.inputs = dict() # {pin name : 0|Net}, 0 => pin is free
+        self.inputNets = [] # [0|Net] in cell.inputPins order, 0 => pin is free
+        self.freeInputs = 0 # Number of 0 entries in inputNets.
+        self.freeMask = 0 # Bitset mirroring inputNets: bit k set <=> slot k is free.
         self.output = [None, 0] # [pin name, 0|Net], 0 => pin is free
 
+    def bindInputs(self):
+        '''
+        Open one input slot per INPUT pin of the cell.
+        '''
+        self.inputNets = [0] * len(self.cell.inputPins)
+        self.freeInputs = len(self.inputNets)
+        self.freeMask = (1 << self.freeInputs) - 1
+
+    def connectFreeInput(self, net):
+        '''
+        Connect net to the first free input pin.
+
+        Return True if a free pin was found, False if the instance is full.
+        The freeInputs counter makes the "is there room" test O(1) for the
+        callers, and the freeMask bitset locates the first free slot with
+        two int operations instead of a scan of the slot list.
+        '''
+        if self.freeMask == 0:
+            return False
+        slot = (self.freeMask & -self.freeMask).bit_length() - 1
+        self.inputNets[slot] = net
+        self.freeMask &= self.freeMask - 1 # Clear the lowest set bit.
+        self.freeInputs -= 1
+        return True
+
 class Net:
+    __slots__ = ("name", "dir")
+
     def __init__(self, name):
         self.name = name
         self.dir = "" # input, output, wire
 
 class Netlist:
+    __slots__ = ("topmodule", "pins", "instances", "nets")
+
     def __init__(self, topmodule):
         self.topmodule = topmodule # [str] name of the to module
         self.pins = list() # [Pin] list of input/output pins of the top module
@@ -88,13 +169,102 @@ class Netlist:
 
 
 
-def parseLEF(leffile):
+# Single compiled scan classifying the LEF lines we care about.
+# One C-level match per line replaces five Python substring scans, and anchoring
+# on the first token avoids false positives like 'PIN' matching inside another word.
+# Sample SIZE line: SIZE 0.42 BY 0.24 ; (width BY height)
+LEF_KEYWORD = re.compile(r'\s*(MACRO|PIN|DIRECTION|USE|SIZE|END)\s+(\S+)(?:\s+BY\s+(\S+))?')
+
+def parseLEFLines(lines, stdCells):
+    """
+    Run the LEF line classifier over an iterable of lines, filling *stdCells*.
+
+    Parameters:
+    -----------
+    lines : iterable of str
+
+    stdCells : dict
+        {cell name : StdCell}, updated in place.
+    """
+
+    macroBlock = False # True if we are in a MACRO block.
+
+    for line in lines:
+        match = LEF_KEYWORD.match(line)
+        if match is None:
+            continue
+        keyword = match.group(1)
+
+        if macroBlock:
+            #######
+            # PIN #
+            #######
+            if keyword == 'PIN':
+                # Interned name: pins like A/B/Y/CLK recur across the whole
+                # library, so lookups hash and compare by pointer identity.
+                pin = Pin(sys.intern(match.group(2))) # Create a Pin object. The name of the pin is the second word in the line 'PIN ...'
+
+            # Direction of the pin previously created.
+            elif keyword == 'DIRECTION':
+                direction = match.group(2)
+                if direction not in ["INPUT", "OUTPUT", "INOUT"]:
+                    logger.error("Unknown pin direction: {}\n Aborting.".format(line))
+                    sys.exit()
+                pin.dir = direction
+
+            # Type of pin.
+            elif keyword == 'USE':
+                use = match.group(2)
+                if use not in ["POWER", "SIGNAL", "CLOCK", "GROUND"]:
+                    logger.error("Unknown pin use: {}\n Aborting.".format(line))
+                    sys.exit()
+                pin.type = use
+
+                if not (NO_POWER and use in ["POWER", "GROUND"]):
+                    stdCell.addPin(pin)
+
+            elif keyword == 'SIZE':
+                # width BY height
+                stdCell.setWidth(float(match.group(2)))
+                stdCell.setHeight(float(match.group(3)))
+
+            elif keyword == 'END' and match.group(2) == stdCell.name:
+                macroBlock = False
+
+        #########
+        # MACRO #
+        #########
+        if keyword == 'MACRO':
+            stdCell = StdCell(sys.intern(match.group(2))) # Create an StdCell object. The name of the StdCell is the second word in the line 'MACRO ...'
+            stdCells[stdCell.name] = stdCell
+            macroBlock = True
+
+def parseLEFRange(args):
+    '''
+    Worker for the parallel parseLEF: parse the byte range [start, end) of
+    the LEF file. The range must be aligned on MACRO boundaries.
+
+    args : (leffile, start, end)
+    '''
+    leffile, start, end = args
+    stdCells = dict()
+    with open(leffile, 'rb') as f:
+        f.seek(start)
+        chunk = f.read(end - start).decode()
+    parseLEFLines(chunk.splitlines(), stdCells)
+    return stdCells
+
+def parseLEF(leffile, jobs=1):
     """
 
     Parameters:
     -----------
     leffile : str
         Path to file to parse
+    jobs : int
+        Number of worker processes. MACRO blocks are independent, so with
+        jobs > 1 the file is split at MACRO boundaries and the ranges are
+        parsed in parallel.
 
     Return:
     -------
@@ -103,63 +273,50 @@ def parseLEF(leffile):
     """
 
     stdCells = dict() # Dictionary of Macro objects. Key: macro name.
-    pinBlock = False # True if we are in a PIN block.
-    macroBlock = False # True if we are in a MACRO block.
 
-    with open(leffile, 'r') as f:
-        lines = f.readlines()
-
-    with alive_bar(len(lines)) as bar:
-        for line in lines:
-            bar()
-            line = line.strip()
-
-            if macroBlock:
-                #######
-                # PIN #
-                #######
-                if 'PIN' in line:
-                    pinName = line.split()[1]
-                    pin = Pin(pinName) # Create a Pin object. The name of the pin is the second word in the line 'PIN ...'
-
-                # Direction of the pin previously created.
-                if 'DIRECTION' in line:
-                    direction = line.split()[1]
-                    if direction not in ["INPUT", "OUTPUT", "INOUT"]:
-                        logger.error("Unknown pin direction: {}\n Aborting.".format(line))
-                        sys.exit()
-                    pin.dir = direction
-
-                # Type of pin.
-                if 'USE ' in line:
-                    use = line.split()[1]
-                    if use not in ["POWER", "SIGNAL", "CLOCK", "GROUND"]:
-                        logger.error("Unknown pin use: {}\n Aborting.".format(line))
-                        sys.exit()
-                    pin.type = use
-
-                    if NO_POWER and use in ["POWER", "GROUND"]:
-                        continue
-                    else:
-                        stdCell.addPin(pin)
-
-            #########
-            # MACRO #
-            #########
-            if 'MACRO' in line:
-                stdCell = StdCell(line.split()[1]) # Create an StdCell object. The name of the StdCell is the second word in the line 'MACRO ...'
-                stdCells[stdCell.name] = stdCell
-                macroBlock = True
-
-            if macroBlock and 'END {}'.format(stdCell.name) in line:
-                macroBlock = False
-
-            if 'SIZE' in line:
-                # Sample line: SIZE 0.42 BY 0.24 ;
-                # width BY height
-                size = line.split()
-                stdCell.setWidth(float(size[1]))
-                stdCell.setHeight(float(size[3]))
+    if jobs > 1:
+        ##################################################
+        # Locate the MACRO boundaries with a cheap byte scan.
+        with open(leffile, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            size = buf.size()
+            bounds = list()
+            pos = buf.find(b'\nMACRO ')
+            while pos != -1:
+                bounds.append(pos + 1)
+                pos = buf.find(b'\nMACRO ', pos + 1)
+
+        # Cut the boundary list into one contiguous byte range per worker.
+        # The first range starts at 0 to swallow the header before the
+        # first MACRO (it contains nothing the classifier keeps).
+        starts = sorted(set([0] + [bounds[len(bounds)*k//jobs] for k in range(1, jobs) if bounds]))
+        ranges = [(leffile, start, end) for start, end
+                  in zip(starts, starts[1:] + [size]) if end > start]
+        with multiprocessing.Pool(len(ranges)) as pool:
+            for part in pool.map(parseLEFRange, ranges):
+                stdCells.update(part)
+    else:
+        # Iterate over the file directly instead of slurping it with readlines(),
+        # so huge LEF files are streamed line by line.
+        # The progress bar tracks bytes read since the line count is not known upfront.
+        # 1 MiB buffer: far fewer read() syscalls than the 8 KiB default on multi-MB files.
+        with open(leffile, 'r', buffering=1024*1024) as f, alive_bar(os.path.getsize(leffile), disable=not PROGRESS) as bar:
+            def countedLines():
+                # Flush the progress bar every 4096 lines: the bar callback
+                # is a Python call and per-line updates add up on huge files.
+                pendingBytes = 0
+                lineCnt = 0
+                for line in f:
+                    pendingBytes += len(line)
+                    lineCnt += 1
+                    if lineCnt & 0xFFF == 0:
+                        bar(pendingBytes)
+                        pendingBytes = 0
+                    yield line
+                bar(pendingBytes)
+            parseLEFLines(countedLines(), stdCells)
+
+    for stdCell in stdCells.values():
+        stdCell.freeze()
     return stdCells
 
 def distributionFromFile(inFile):
@@ -177,80 +334,69 @@ def distributionFromFile(inFile):
     distribution : dict
         {cell name : weight}
     """
+    cells = list()
+    quantities = list()
     with open(inFile, 'r') as f:
-        lines = f.readlines()
-    distribution = dict()
-    for line in lines:
-        distribution[line.split()[0]] = float(line.split()[1])
+        for line in f:
+            words = line.split()
+            cells.append(words[0])
+            quantities.append(words[1])
 
     ###############
     # Normalisation
-    total = sum(distribution.values())
-    for cell in distribution.keys():
-        distribution[cell] = distribution[cell]/total
+    # Single vectorized reduce-and-divide instead of a Python loop.
+    weights = np.asarray(quantities, dtype=np.float64)
+    weights /= weights.sum()
 
-    return distribution
+    return dict(zip(cells, weights.tolist()))
 
-def regenFF(distribution, stdCells, ffGates, freeFF):
+def regenFF(ffNames, ffCumWeights, stdCells, ffGates, freeFF, netlist):
     """
     Regenerate a new FF based on the given distribution.
 
-    Append the new FF to ffGates.
+    The new FF is registered in ffGates, freeFF and the netlist, and gets
+    its own output net: callers receive a fully-formed instance.
 
     Parameters:
     -----------
-    distribution : dict
-        {cell name : weight}
+    ffNames : list
+        Names of the FF cells (cells owning a CLOCK pin).
+    ffCumWeights : list
+        Cumulative weights matching ffNames.
     stdCells : dict
         {cell name : StdCell}
+    netlist : Netlist
 
     Return:
     -------
     ff : Instance
     """
-    found = False
-    cellName = None
-    while not found:
-        cellName = random.choices(list(distribution.keys()), distribution.values(), k=1)[0]
-        cell = stdCells[cellName]
-        for pin in cell.pins.values():
-            if pin.type == "CLOCK":
-                found = True
-    name = cell.name.lower() + "_" + str(len(ffGates))
+    # Direct cumulative-weight draw restricted to the FF cells: no rebuilding
+    # of the weight table per call and no rejection loop on non-FF picks.
+    cellName = ffNames[bisect.bisect(ffCumWeights, random.random() * ffCumWeights[-1])]
+    cell = stdCells[cellName]
+    # Suffix with the netlist-wide instance count: the initial instances use
+    # indices below ngates, so regenerated FFs can never collide with them.
+    name = f"{cell.lowerName}_{len(netlist.instances)}"
     instance = Instance(name, cell=cell)
     #############################################################
-    # Extract and list all pins of the stdcell into the instance.
-    outputPinName = ""
-    for pin in cell.pins.values():
-        if pin.dir == "INPUT":
-            instance.inputs[pin.name] = 0
-        elif pin.dir == "OUTPUT":
-            if instance.output[0] != None:
-                logger.error("Too many outputs in cell {}\n Aborting".format(cell.name))
-                sys.exit()
-            instance.output[0] = pin.name
-            outputPinName = pin.name
-        else:
-            logger.error("Unexpected pin dir: {} for pin {} in cell {}\n Aborting".format(pin.dir, pin.name, cell.name))
-            sys.exit()
-
-    ffGates.append(instance)
-    freeFF.append(instance)
-    # logger.debug("freeFF in regenFF: {}".format(freeFF))
-    # logger.debug("Instance address in regen: {}".format(instance))
-    
-    return instance
-
-
-
+    # Pin roles are precomputed on the cell, no per-instance scan.
+    instance.bindInputs()
+    instance.output[0] = cell.outputPin
 
     #######################################
-    # Create a net for each instance output
+    # Create a net for the instance output
     net = Net(instance.name + "_net")
     net.dir = "wire" # not connected to an I/O pin yet.
     instance.output[1] = net
     netlist.nets.append(net)
 
+    ffGates.append(instance)
+    freeFF.append(instance)
+    netlist.instances.append(instance)
+
+    return instance
+
 
 
 def generateNetlist(name, stdCells, distribution, fanout, ngates):
@@ -291,26 +437,41 @@ def generateNetlist(name, stdCells, distribution, fanout, ngates):
 
     netlist = Netlist(name)
 
-    cells = random.choices(list(distribution.keys()), distribution.values(), k=ngates)
-
-    logic = set()
-    ff = set()
+    # Draw all the cells in one vectorized numpy call: random.choices loops
+    # in Python and rebuilds its cumulative weights, which does not scale to
+    # millions of gates.
+    cellNames = list(distribution.keys())
+    weights = np.fromiter(distribution.values(), dtype=np.float64)
+    weights /= weights.sum() # numpy wants probabilities summing exactly to 1.
+    rng = np.random.default_rng(RANDOM_SEED if RANDOM_SEED else None)
+    cellCodes = rng.choice(len(cellNames), size=ngates, p=weights)
+    cells = [cellNames[i] for i in cellCodes]
+
+    # Cumulative sampling table restricted to the FF cells, so regenFF can
+    # draw a clocked cell directly instead of rejecting non-FF picks.
+    ffNames = [c for c in cellNames if stdCells[c].isFF]
+    ffCumWeights = np.cumsum([distribution[c] for c in ffNames]).tolist()
+
+    # Buffered uniform draws for the pick-an-element loops below: one
+    # vectorized rng call covers 1024 picks. The floats are scaled by the
+    # list length at use time, so they stay valid while the lists shrink.
+    floatPool = iter(rng.random(1024))
+    def randIndex(n):
+        nonlocal floatPool
+        try:
+            r = next(floatPool)
+        except StopIteration:
+            floatPool = iter(rng.random(1024))
+            r = next(floatPool)
+        return int(r * n)
 
     #######################
     # Stats on logic and FF
-    logicCnt = 0
-    ffCnt = 0
-    for c in cells:
-        cell = stdCells[c]
-        logicCnt += 1
-        logic.add(c)
-        for pin in cell.pins.values():
-            if pin.type == "CLOCK":
-                ffCnt += 1
-                ff.add(c)
-                logicCnt -= 1
-                logic.remove(c)
-                break
+    # One isFF lookup per library cell, then a C-level gather/reduce over
+    # the sampled codes instead of a per-gate Python scan.
+    isFFLut = np.fromiter((stdCells[c].isFF for c in cellNames), dtype=bool, count=len(cellNames))
+    ffCnt = int(isFFLut[cellCodes].sum())
+    logicCnt = len(cells) - ffCnt
     logger.info("Logic: {} ({}%), FF: {} ({}%)".format(logicCnt, 100*logicCnt/(logicCnt+ffCnt), ffCnt, 100*ffCnt/(ffCnt+logicCnt)))
 
 
@@ -322,48 +483,40 @@ def generateNetlist(name, stdCells, distribution, fanout, ngates):
     ###################
     # Prepare instances
     # Assign them their stand cell and create a net at the output.
-    with alive_bar(len(cells)) as bar:
-        for i, c in enumerate(cells):
-            bar()
-            cell = stdCells[c]
-            name = cell.name.lower() + "_" + str(i)
-            instance = Instance(name, cell=cell)
+    # Batch the allocations: instances and their output nets come from plain
+    # list comprehensions, then a single zip pass binds pins and classifies.
+    instanceCells = [stdCells[c] for c in cells]
+    instances = [Instance(f"{cell.lowerName}_{i}", cell=cell)
+                 for i, cell in enumerate(instanceCells)]
+    nets = [Net(f"{instance.name}_net") for instance in instances]
+    with alive_bar(len(cells), disable=not PROGRESS) as bar:
+        # Amortize the bar updates over 16k-instance batches: the bar
+        # callback costs more than the few attribute writes in the body.
+        for i, (instance, net) in enumerate(zip(instances, nets)):
+            if i & 0x3FFF == 0x3FFF:
+                bar(0x4000)
+            cell = instance.cell
 
             #############################################################
-            # Extract and list all pins of the stdcell into the instance.
-            outputPinName = ""
-            for pin in cell.pins.values():
-                if pin.dir == "INPUT":
-                    instance.inputs[pin.name] = 0
-                elif pin.dir == "OUTPUT":
-                    if instance.output[0] != None:
-                        logger.error("Too many outputs in cell {}\n Aborting".format(cell.name))
-                        sys.exit()
-                    instance.output[0] = pin.name
-                    outputPinName = pin.name
-                else:
-                    logger.error("Unexpected pin dir: {} for pin {} in cell {}\n Aborting".format(pin.dir, pin.name, cell.name))
-                    sys.exit()
-
+            # Pin roles are precomputed on the cell, no per-instance scan.
+            instance.bindInputs()
+            instance.output[0] = cell.outputPin
 
             #######################################
-            # Create a net for each instance output
-            net = Net(instance.name + "_net")
+            # Each instance output drives its own net.
             net.dir = "wire" # not connected to an I/O pin yet.
             instance.output[1] = net
-            netlist.nets.append(net)
 
-            # Classify type of gate
-            if instance.cell.name in logic:
-                logicGates.append(instance)
-            elif instance.cell.name in ff:
+            # Classify type of gate: the isFF flag makes the split a plain
+            # attribute test, with no membership sets to maintain.
+            if cell.isFF:
                 ffGates.append(instance)
             else:
-                logger.error("Instance is neither a logic gate nor an FF.\n Aborting")
-                sys.exit()
-
-            netlist.instances.append(instance)
-    rentParameterT = sum([len(x.inputs)+1 for x in logicGates])/len(logicGates)
+                logicGates.append(instance)
+        bar(len(cells) & 0x3FFF)
+    netlist.nets.extend(nets)
+    netlist.instances.extend(instances)
+    rentParameterT = sum([len(x.inputNets)+1 for x in logicGates])/len(logicGates)
     logger.info("Rent's t parameter: {}".format(rentParameterT))
     # freeFF = ffGates[:]
 
@@ -405,20 +558,21 @@ def generateNetlist(name, stdCells, distribution, fanout, ngates):
         # For each input pin, create a new FF if necessary."
         if pin.dir == "INPUT":
             if len(freeFF) == 0:
-                candidate = regenFF(distribution, stdCells, ffGates, freeFF)
+                candidate = regenFF(ffNames, ffCumWeights, stdCells, ffGates, freeFF, netlist)
+                j = len(freeFF) - 1 # regenFF appends the new FF to freeFF.
                 # logger.debug("freeFF in pin assignment: {}".format(freeFF))
                 # logger.debug("instance address: {}".format(instance))
             else:
-                candidate = random.choice(freeFF)
-            for pin in candidate.inputs.keys():
-                if candidate.inputs[pin] == 0:
-                    candidate.inputs[pin] = net
-                    break
-            # logger.debug("instance inputs: {}".format(candidate.inputs))
-            # logger.debug("instance in freeFF inputs: {}".format(freeFF[0].inputs))
+                j = randIndex(len(freeFF))
+                candidate = freeFF[j]
+            candidate.connectFreeInput(net)
+            # logger.debug("instance inputs: {}".format(candidate.inputNets))
+            # logger.debug("instance in freeFF inputs: {}".format(freeFF[0].inputNets))
             # sys.exit()
-            if not 0 in candidate.inputs.values():
-                freeFF.remove(candidate)
+            if candidate.freeInputs == 0:
+                # Swap-to-end removal: O(1) instead of list.remove's scan.
+                freeFF[j] = freeFF[-1]
+                freeFF.pop()
 
     # Then manage the output, as we don't want to have a single FF connecting an input to an output.
     for pin in netlist.pins:
@@ -427,15 +581,12 @@ def generateNetlist(name, stdCells, distribution, fanout, ngates):
         netlist.nets.append(net) # Necessary?
         # For each output pin, create a new FF to connect."
         if pin.dir == "OUTPUT":
-            candidate = regenFF(distribution, stdCells, ffGates, freeFF)
+            candidate = regenFF(ffNames, ffCumWeights, stdCells, ffGates, freeFF, netlist)
+            # This FF drives the IO pin directly: drop the unused wire net
+            # regenFF just appended and connect the IO net instead.
+            netlist.nets.pop()
             candidate.output[0] = pin.name
             candidate.output[1] = net
-    sys.exit()
-
-    ##############################
-    # XXXXXXXXXXXXXXXXXXXXXXXXXX #
-    ##############################
-
 
 
     ###############################
@@ -447,117 +598,137 @@ def generateNetlist(name, stdCells, distribution, fanout, ngates):
     clockPin = Pin("clock")
     clockPin.dir = "INPUT"
     clockPin.type = "CLOCK"
-    netlist.pins.append(clock)
+    netlist.pins.append(clockPin)
 
     for instance in netlist.instances:
-        for pinName in instance.inputs.keys():
-            pinType = stdCells[instance.cell.name].pins[pinName].type
-            if pinType == "CLOCK":
-                instance.inputs[pinName] = clock
+        clockIndex = instance.cell.clockIndex
+        if clockIndex is not None:
+            if instance.inputNets[clockIndex] == 0:
+                instance.freeInputs -= 1
+                instance.freeMask &= ~(1 << clockIndex)
+            instance.inputNets[clockIndex] = clock
 
 
 
     ################################
     # Alternative logic clouds
     logger.info("Creating clouds of logic.")
+    # Uniform picks over ffGates let a handful of FFs accumulate enormous
+    # fanout, which bloats the written pin lists and chokes downstream
+    # tools on a few huge nets. Track per-FF fanout and retire donors that
+    # reach MAX_FF_FANOUT from the pool.
+    ffFanout = list() # Parallel to ffGates: cloud inputs driven so far.
+    ffDonors = list() # Indices into ffGates still below MAX_FF_FANOUT.
     while len(logicGates) > 0:
         # Get a sample of logic gates
         # cloudSize = random function of the total gates in the design
         ioCount = [0,0] # number of inputs, outputs of the cloud
         cloudSize = random.randint(10,100)
         logger.info("Cloud size: {}".format(cloudSize))
-        if cloudSize < len(logicGates):
-            cloud = random.sample(logicGates, k=cloudSize)
-        else:
-            cloud = logicGates[:]
-        for gate in cloud:
-            logicGates.remove(gate)
+        # Extract the cloud by swapping the sampled gates to the end of
+        # logicGates and popping them: each list.remove was a linear scan,
+        # making the extraction quadratic in the number of gates.
+        cloudSize = min(cloudSize, len(logicGates))
+        cloud = list()
+        for i in sorted(random.sample(range(len(logicGates)), k=cloudSize), reverse=True):
+            cloud.append(logicGates[i])
+            logicGates[i] = logicGates[-1]
+            logicGates.pop()
         levels = list()
-        # Slice the could into levels
-        while len(cloud) > 0:
-            levelSize = min([random.randint(1, 10), len(cloud)])
-            # levelSize = min([int(random.gauss(cloudSize/averageCP,0.1*cloudSize/averageCP)), len(cloud)])
-            level = random.sample(cloud, k=levelSize)
-            for gate in level:
-                cloud.remove(gate)
-            levels.append(level)
+        # Slice the cloud into levels. The cloud is already a uniform random
+        # sample, so a shuffle followed by consecutive slices is equivalent
+        # to repeated sampling without the remove() scans.
+        random.shuffle(cloud)
+        sliceStart = 0
+        while sliceStart < len(cloud):
+            levelSize = min([random.randint(1, 10), len(cloud) - sliceStart])
+            # levelSize = min([int(random.gauss(cloudSize/averageCP,0.1*cloudSize/averageCP)), len(cloud) - sliceStart])
+            levels.append(cloud[sliceStart:sliceStart+levelSize])
+            sliceStart += levelSize
         logger.info("Number of levels: {}".format(len(levels)))
         # For each level, connect all the input to the outputs of the previous level.
         # If any previous level output is not connected, forward if to a FF.
         for i in range(len(levels)-1):
             level = levels[i+1]
             prevLevel = levels[i]
-            outputNets = set([x.output[1] for x in prevLevel])
-            outputNetsAssigned = set()
+            # One vectorized draw for every input pin of the level, instead
+            # of a per-pin random.choice over a list rebuilt from the set.
+            prevNets = [x.output[1] for x in prevLevel]
+            totalInputs = sum(len(instance.inputNets) for instance in level)
+            picks = rng.integers(0, len(prevNets), size=totalInputs)
+            k = 0
             for instance in level:
-                for inputPin in instance.inputs.keys():
-                    outputNet = random.choice(list(outputNets))
-                    outputNetsAssigned.add(outputNet)
-                    instance.inputs[inputPin] = outputNet
-            outputNetsUnassigned = outputNets - outputNetsAssigned
+                for i in range(len(instance.inputNets)):
+                    instance.inputNets[i] = prevNets[picks[k]]
+                    k += 1
+                instance.freeInputs = 0
+                instance.freeMask = 0
+            # Mark the drawn outputs in a boolean mask: no hashing of Net
+            # objects into sets, and the unassigned ones fall out of the
+            # mask complement directly.
+            assigned = np.zeros(len(prevNets), dtype=bool)
+            assigned[picks] = True
+            outputNetsUnassigned = [prevNets[i] for i in np.flatnonzero(~assigned)]
             # For each gate wich output has not been assigned to an input of level i, connect a FF.
             for net in outputNetsUnassigned:
                 if len(freeFF) > 0:
-                    flipflop = random.choice(freeFF)
+                    j = randIndex(len(freeFF))
+                    flipflop = freeFF[j]
                 else:
-                    flipflop = regenFF(distribution, stdCells, ID=len(ffGates))
-                    netlist.instances.append(flipflop)
-                    # Create a net for the output
-                    netFF = Net(flipflop.name + "_net")
-                    netFF.dir = "wire" # not connected to an I/O pin yet.
-                    flipflop.output[1] = netFF
-                    netlist.nets.append(netFF)
-                    
-                    ffGates.append(flipflop)
-                    netlist.instances.append(flipflop)
-                    freeFF.append(flipflop)
-
-
+                    # regenFF registers the FF (ffGates, freeFF, netlist)
+                    # and creates its output net.
+                    flipflop = regenFF(ffNames, ffCumWeights, stdCells, ffGates, freeFF, netlist)
+                    j = len(freeFF) - 1
                     # logger.warning("No more FF available for cloud outputs connections.\n Creating a new FF.")
                 # Use the first pin available in the FF, we just don't care.
-                for pin in flipflop.inputs.keys():
-                    if flipflop.inputs[pin] == 0:
-                        flipflop.inputs[pin] = net
-                        ioCount[1] += 1
-                        break
+                if flipflop.connectFreeInput(net):
+                    ioCount[1] += 1
                 # If no more avaible inputs, remove from the "free" list.
-                if not 0 in flipflop.inputs.values():
-                    freeFF.remove(flipflop)
+                if flipflop.freeInputs == 0:
+                    freeFF[j] = freeFF[-1]
+                    freeFF.pop()
         # For each gate in the first level, connect each input to a FF.
+        # Admit the FFs regenerated since the last cloud into the donor pool.
+        while len(ffFanout) < len(ffGates):
+            ffDonors.append(len(ffFanout))
+            ffFanout.append(0)
         for instance in levels[0]:
-            for pin in instance.inputs.keys():
-                instance.inputs[pin] = random.choice(ffGates).output[1]
+            for i in range(len(instance.inputNets)):
+                if len(ffDonors) == 0:
+                    # Every FF is saturated: regenerate one to spread the load.
+                    regenFF(ffNames, ffCumWeights, stdCells, ffGates, freeFF, netlist)
+                    ffDonors.append(len(ffFanout))
+                    ffFanout.append(0)
+                j = randIndex(len(ffDonors))
+                idx = ffDonors[j]
+                instance.inputNets[i] = ffGates[idx].output[1]
+                ffFanout[idx] += 1
+                if ffFanout[idx] >= MAX_FF_FANOUT:
+                    ffDonors[j] = ffDonors[-1]
+                    ffDonors.pop()
                 ioCount[0] += 1
+            instance.freeInputs = 0
+            instance.freeMask = 0
         # Each output of the last level needs to be connected to a FF
         for instance in levels[-1]:
             net = instance.output[1]
 
             if len(freeFF) > 0:
-                flipflop = random.choice(freeFF)
+                j = randIndex(len(freeFF))
+                flipflop = freeFF[j]
             else:
-                flipflop = regenFF(distribution, stdCells, ID=len(ffGates))
-                netlist.instances.append(flipflop)
-                # Create a net for the output
-                netFF = Net(flipflop.name + "_net")
-                netFF.dir = "wire" # not connected to an I/O pin yet.
-                flipflop.output[1] = netFF
-                netlist.nets.append(netFF)
-                
-                ffGates.append(flipflop)
-                netlist.instances.append(flipflop)
-                freeFF.append(flipflop)
-
-
+                # regenFF registers the FF (ffGates, freeFF, netlist)
+                # and creates its output net.
+                flipflop = regenFF(ffNames, ffCumWeights, stdCells, ffGates, freeFF, netlist)
+                j = len(freeFF) - 1
                 # logger.warning("No more FF available for cloud outputs connections.\n Creating a new FF.")
             # Use the first pin available in the FF, we just don't care.
-            for pin in flipflop.inputs.keys():
-                if flipflop.inputs[pin] == 0:
-                    flipflop.inputs[pin] = net
-                    ioCount[1] += 1
-                    break
+            if flipflop.connectFreeInput(net):
+                ioCount[1] += 1
             # If no more avaible inputs, remove from the "free" list.
-            if not 0 in flipflop.inputs.values():
-                freeFF.remove(flipflop)
+            if flipflop.freeInputs == 0:
+                freeFF[j] = freeFF[-1]
+                freeFF.pop()
 
         logger.info("IO count for this cloud: {} (Rent's p = {})".format(ioCount, np.log(sum(ioCount)/3.7)))
 
@@ -569,23 +740,22 @@ def generateNetlist(name, stdCells, distribution, fanout, ngates):
     # Interconnect the remaining FFs into shift registers and the like.
     logger.debug("Remaining FFs: {}".format(len(freeFF)))
     while len(freeFF) > 0:
-        donnorFF = random.choice(freeFF) # FF giving an output
+        donnorFF = freeFF[randIndex(len(freeFF))] # FF giving an output
         net = donnorFF.output[1]
         found = False
         while not found:
             if len(freeFF) == 0:
                 logger.warning("No more available inputs on FFs to connect other FFs.")
                 break
-            receiverFF = random.choice(freeFF) # FF receiving said output to one of its free inputs
-            if 0 in receiverFF.inputs.values():
-                for pin in receiverFF.inputs.keys():
-                    if receiverFF.inputs[pin] == 0:
-                        receiverFF.inputs[pin] = net
-                        break
+            j = randIndex(len(freeFF))
+            receiverFF = freeFF[j] # FF receiving said output to one of its free inputs
+            if receiverFF.freeInputs > 0:
+                receiverFF.connectFreeInput(net)
                 found = True
             else:
                 # logger.debug("Removing {} in FF registers".format(receiverFF.name))
-                freeFF.remove(receiverFF)
+                freeFF[j] = freeFF[-1]
+                freeFF.pop()
 
 
     return netlist
@@ -603,53 +773,67 @@ def writeNetlist(netlist, suppressWires):
         If True, do not write 'wire' statements
     """
 
-    #############################
-    # First: top module and pins.
-    outStr = "module {} ( {} );\n".format(netlist.topmodule, ",".join([x.name for x in netlist.pins]))
-    for pin in netlist.pins:
-        outStr += "{} {};\n".format(pin.dir.lower(), pin.name)
-
-    ################
-    # Nets and wires
-    if not suppressWires:
-        for net in netlist.nets:
-            if net.dir == "wire":
-                outStr += "{} {};\n".format(net.dir, net.name)
-
-    ###########
-    # Instances
+    filename = "{}.v".format(netlist.topmodule)
     unassigned = False
-    for instance in netlist.instances:
-        # print(instance.cell.name)
-        outStr += "{} {} ( ".format(instance.cell.name, instance.name)
-        pinStrList = list()
-        for pin in instance.cell.pins.values():
-            pinStr = "." + pin.name + "("
-            if pin.dir == "OUTPUT":
-                pinStr += instance.output[1].name
-            elif pin.dir == "INPUT":
-                if instance.inputs[pin.name] == 0:
-                    pinStr += "UNASSIGNED"
-                    unassigned = True
-                    logger.warning("UNASSIGNED pin '{}' in '{}'".format(pin.name, instance.name))
+
+    # Stream each statement straight to the (buffered) file instead of
+    # accumulating one giant string: repeated str += is quadratic and keeps
+    # the whole netlist in memory a second time.
+    # Binary mode with explicit ascii encoding: the netlist is pure ASCII,
+    # so the text layer's codec and newline translation are dead weight.
+    with open(filename, 'wb', buffering=1024*1024) as f:
+        #############################
+        # First: top module and pins.
+        f.write("module {} ( {} );\n".format(netlist.topmodule, ",".join([x.name for x in netlist.pins])).encode('ascii'))
+        for pin in netlist.pins:
+            f.write(f"{pin.dir.lower()} {pin.name};\n".encode('ascii'))
+
+        ################
+        # Nets and wires
+        if not suppressWires:
+            for net in netlist.nets:
+                if net.dir == "wire":
+                    # f-string: no runtime format-spec parsing in this per-net loop.
+                    f.write(f"{net.dir} {net.name};\n".encode('ascii'))
+
+        ###########
+        # Instances
+        # Instances sharing a StdCell all use the same ".pin(...)" scaffolding,
+        # so build one template per cell and only substitute the net names.
+        templates = dict() # {cell name : format string}
+        for instance in netlist.instances:
+            cell = instance.cell
+            template = templates.get(cell.name)
+            if template is None:
+                template = cell.name + " {} ( " + ", ".join("." + pinName + "({})" for pinName in cell.pinNames) + " );\n"
+                templates[cell.name] = template
+            netNames = list()
+            # Walk the flat pinNames/pinDirs tuples rather than the Pin
+            # objects: no dict iteration, no attribute chase per pin.
+            # The input slots of the instance follow cell.inputPins order,
+            # so a running cursor maps each INPUT pin to its net.
+            inputIdx = 0
+            for pinName, pinDir in zip(cell.pinNames, cell.pinDirs):
+                if pinDir == "OUTPUT":
+                    netNames.append(instance.output[1].name)
+                elif pinDir == "INPUT":
+                    net = instance.inputNets[inputIdx]
+                    inputIdx += 1
+                    if net == 0:
+                        netNames.append("UNASSIGNED")
+                        unassigned = True
+                        logger.warning("UNASSIGNED pin '{}' in '{}'".format(pinName, instance.name))
+                    else:
+                        netNames.append(net.name)
                 else:
-                    pinStr += instance.inputs[pin.name].name
-            pinStr += ")"
-            pinStrList.append(pinStr)
-        outStr += ", ".join(pinStrList)
-        outStr += ");\n"
+                    netNames.append("") # e.g. INOUT, left unconnected as before
+            f.write(template.format(instance.name, *netNames).encode('ascii'))
 
-    outStr += "\n endmodule"
+        f.write(b"\n endmodule")
 
     if unassigned:
         logger.warning("There were some UNASSIGNED pins in the netlist")
 
-    ############
-    # Write file
-    filename = "{}.v".format(netlist.topmodule)
-    with open(filename, 'w') as f:
-        f.write(outStr)
-
 
 
 
@@ -662,6 +846,7 @@ if __name__ == "__main__":
     topModuleName = "customDesign"
     fanout = 3
     ngates = 10
+    jobs = 1
     suppressWires = False
 
     if args["--lef"]:
@@ -674,6 +859,8 @@ if __name__ == "__main__":
         fanout = args["--fanout"]
     if args["--gates"]:
         ngates = int(args["--gates"])
+    if args["--jobs"]:
+        jobs = int(args["--jobs"])
     if args["--suppress-wires"]:
         suppressWires = True
 
@@ -711,7 +898,7 @@ if __name__ == "__main__":
     ########
     stdCells = dict() # {name : StdCell instance}
 
-    stdCells = parseLEF(leffile)
+    stdCells = parseLEF(leffile, jobs=jobs)
 
     distribution = distributionFromFile(distfile)
 